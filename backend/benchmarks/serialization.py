@@ -0,0 +1,108 @@
+"""
+Benchmark /api/papers serialization: ORM objects + jsonable_encoder (previous
+behavior) against tuple rows + orjson (current behavior).
+
+Runs against an in-memory SQLite database so it needs no running Postgres.
+
+Usage (from backend/):
+    python benchmarks/serialization.py [N ...]
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+
+from database import Base, SessionLocal, engine
+from models import Paper, Tag, paper_tags
+from queries import list_papers
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+def seed(n: int):
+    """Fill a fresh database with n papers, 20 tags, and two tags per paper"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(Tag.__table__.insert(), [
+            {"id": f"tag_{i}", "name": f"Tag {i}", "color": "#3b82f6", "created_at": now}
+            for i in range(20)
+        ])
+        conn.execute(Paper.__table__.insert(), [
+            {
+                "id": f"https://openalex.org/W{i}",
+                "title": f"A study of serialization overhead, part {i}",
+                "authors": ["Ada Lovelace", "Alan Turing", "Grace Hopper"],
+                "year": 2000 + i % 25,
+                "journal": "Journal of Benchmarks",
+                "volume": str(i % 50),
+                "issue": str(i % 12),
+                "pages": "1-20",
+                "url": f"https://doi.org/10.1234/{i}",
+                "abstract": "Lorem ipsum dolor sit amet. " * 20,
+                "pdf_path": None,
+                "created_at": now,
+            }
+            for i in range(n)
+        ])
+        conn.execute(paper_tags.insert(), [
+            {"paper_id": f"https://openalex.org/W{i}", "tag_id": f"tag_{(i + k) % 20}"}
+            for i in range(n) for k in range(2)
+        ])
+
+
+def previous(db):
+    """Fetch ORM objects, render with jsonable_encoder + json.dumps"""
+    papers = db.query(Paper).all()
+    return papers, lambda: JSONResponse(jsonable_encoder(papers)).body
+
+
+def current(db):
+    """Fetch tuple rows, render with orjson"""
+    papers = list_papers(db)
+    return papers, lambda: ORJSONResponse(papers).body
+
+
+def timed(path, repeat: int = 3):
+    """Best-of-N (fetch + encode, encode only) timings in seconds"""
+    best_total = best_encode = float("inf")
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            _, encode = path(db)
+            fetched = time.perf_counter()
+            encode()
+            end = time.perf_counter()
+        finally:
+            db.close()
+        best_total = min(best_total, end - start)
+        best_encode = min(best_encode, end - fetched)
+    return best_total, best_encode
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'papers':>8}  {'':>6}  {'previous (s)':>12}  {'current (s)':>11}  {'speedup':>7}  {'papers/s (current)':>18}")
+    for n in sizes:
+        seed(n)
+        old_total, old_encode = timed(previous)
+        new_total, new_encode = timed(current)
+        for label, old, new in (("total", old_total, new_total), ("encode", old_encode, new_encode)):
+            print(f"{n:>8}  {label:>6}  {old:>12.3f}  {new:>11.3f}  {old / new:>6.1f}x  {n / new:>18,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+import heapq
+import inspect
+import itertools
+import os
+import threading
+import uuid
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from database import SessionLocal
+from models import Job, Paper
+from pdf_storage import get_pdf_path, inspect_pdf
+
+# Threads run job handlers (I/O, database); processes run CPU-heavy steps
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_CPU_WORKERS = int(os.getenv("JOB_CPU_WORKERS", str(os.cpu_count() or 2)))
+# Minimum seconds between progress writes to the jobs table
+JOB_PROGRESS_PERSIST_SECONDS = 1.0
+
+TERMINAL_STATUSES = {"succeeded", "failed", "cancelled"}
+JOB_FIELDS = tuple(column.key for column in Job.__table__.columns)
+_EXHAUSTED = object()
+
+
+class JobCancelled(Exception):
+    """Raised inside a job handler once cancellation has been requested"""
+
+
+@dataclass
+class JobType:
+    handler: Callable[["JobContext", Dict[str, Any]], Any]
+    max_concurrency: int
+    description: str
+
+
+JOB_TYPES: Dict[str, JobType] = {}
+
+
+def job_type(name: str, max_concurrency: int = 1):
+    """
+    Register a job handler under `name`
+
+    The handler is called as handler(ctx, params) on a worker thread and its
+    return value is stored as the job result.
+
+    Args:
+        name: Job type name used when submitting
+        max_concurrency: Maximum jobs of this type running at once
+    """
+    def register(handler):
+        JOB_TYPES[name] = JobType(handler, max_concurrency, inspect.cleandoc(handler.__doc__ or ""))
+        return handler
+    return register
+
+
+# =============================================================================
+# SCHEDULER STATE
+# =============================================================================
+
+# (-priority, sequence, job_id); sequence keeps FIFO order within a priority
+_queue: List[Tuple[int, int, str]] = []
+_sequence = itertools.count()
+_running_by_type: Dict[str, int] = defaultdict(int)
+_running_total = 0
+# Live state of queued and running jobs, mirrored to the jobs table
+_states: Dict[str, Dict[str, Any]] = {}
+_contexts: Dict[str, "JobContext"] = {}
+_cond = threading.Condition()
+_stopping = False
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+_dispatcher: Optional[threading.Thread] = None
+
+
+def _job_dict(job: Job) -> Dict[str, Any]:
+    return {field: getattr(job, field) for field in JOB_FIELDS}
+
+
+def _persist(job_id: str, fields: Dict[str, Any]):
+    """Write job fields to the database"""
+    db = SessionLocal()
+    try:
+        db.query(Job).filter(Job.id == job_id).update(fields)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Failed to update job {job_id}: {str(e)}")
+    finally:
+        db.close()
+
+
+def _finish(job_id: str, **fields):
+    """
+    Record a job's final status along with its latest live progress, which
+    may be newer than the throttled copy in the database
+    """
+    with _cond:
+        state = _states.get(job_id) or {}
+        progress = {key: state[key] for key in ("progress_done", "progress_total", "message") if key in state}
+    _update(job_id, **progress, **fields)
+
+
+def _update(job_id: str, persist: bool = True, **fields):
+    """Update a job's live state and (optionally) its row"""
+    with _cond:
+        state = _states.get(job_id)
+        if state is not None:
+            state.update(fields)
+    if persist:
+        _persist(job_id, fields)
+
+
+class JobContext:
+    """
+    Handle passed to job handlers for progress reporting, cancellation
+    checks and offloading CPU work to the process pool
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._cancel = threading.Event()
+        self._cancel_requested = False
+        self._last_persist = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """Raise JobCancelled if the job should stop"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def report(self, done: int, total: Optional[int] = None, message: Optional[str] = None):
+        """
+        Report progress. Live state updates immediately; database writes are throttled.
+
+        Args:
+            done: Units of work completed
+            total: Total units of work, if known
+            message: Short human-readable status
+        """
+        fields: Dict[str, Any] = {"progress_done": done}
+        if total is not None:
+            fields["progress_total"] = total
+        if message is not None:
+            fields["message"] = message
+
+        now = datetime.utcnow().timestamp()
+        persist = now - self._last_persist >= JOB_PROGRESS_PERSIST_SECONDS or done == total
+        if persist:
+            self._last_persist = now
+        _update(self.job_id, persist=persist, **fields)
+        self.check_cancelled()
+
+    def map_cpu(self, fn: Callable[[Any], Any], items: Iterable[Tuple[Any, Any]]) -> Iterator[Tuple[Any, Any]]:
+        """
+        Run fn(arg) in the process pool for each (tag, arg) pair
+
+        Keeps a bounded number of tasks in flight and stops submitting as soon
+        as the job is cancelled. `fn` must be a picklable top-level function.
+        Tags stay in this process and identify each result.
+
+        Yields:
+            (tag, result) pairs in completion order
+        """
+        items = iter(items)
+        pending = {}
+        window = JOB_CPU_WORKERS * 2
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < window:
+                    item = next(items, _EXHAUSTED)
+                    if item is _EXHAUSTED:
+                        exhausted = True
+                    else:
+                        tag, arg = item
+                        pending[_process_pool.submit(fn, arg)] = tag
+                if not pending:
+                    return
+                done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                self.check_cancelled()
+                for future in done:
+                    yield pending.pop(future), future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+# =============================================================================
+# DISPATCH
+# =============================================================================
+
+def _next_runnable() -> Optional[str]:
+    """Pop the highest priority queued job whose type is under its concurrency cap"""
+    if _running_total >= JOB_WORKERS:
+        return None
+    skipped = []
+    chosen = None
+    while _queue:
+        entry = heapq.heappop(_queue)
+        state = _states.get(entry[2])
+        if state is None or state["status"] != "queued":
+            continue  # Cancelled while queued
+        if _running_by_type[state["type"]] >= JOB_TYPES[state["type"]].max_concurrency:
+            skipped.append(entry)
+            continue
+        chosen = entry[2]
+        break
+    for entry in skipped:
+        heapq.heappush(_queue, entry)
+    return chosen
+
+
+def _dispatch_loop():
+    global _running_total
+    with _cond:
+        while not _stopping:
+            job_id = _next_runnable()
+            if job_id is None:
+                _cond.wait()
+                continue
+            job_type_name = _states[job_id]["type"]
+            _running_by_type[job_type_name] += 1
+            _running_total += 1
+            _states[job_id]["status"] = "running"
+            _thread_pool.submit(_run_job, job_id)
+
+
+def _run_job(job_id: str):
+    global _running_total
+    with _cond:
+        state = _states[job_id]
+        ctx = _contexts[job_id]
+        job_type_name = state["type"]
+        params = state["params"] or {}
+
+    _update(job_id, status="running", started_at=datetime.utcnow())
+    try:
+        result = JOB_TYPES[job_type_name].handler(ctx, params)
+        _finish(job_id, status="succeeded", result=result, finished_at=datetime.utcnow())
+    except JobCancelled:
+        if ctx._cancel_requested:
+            _finish(job_id, status="cancelled", finished_at=datetime.utcnow())
+        else:
+            # Interrupted by shutdown; picked up again on next startup
+            _finish(job_id, status="queued", started_at=None)
+    except Exception as e:
+        print(f"Job {job_id} ({job_type_name}) failed: {str(e)}")
+        _finish(job_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+    finally:
+        with _cond:
+            _running_by_type[job_type_name] -= 1
+            _running_total -= 1
+            _states.pop(job_id, None)
+            _contexts.pop(job_id, None)
+            _cond.notify_all()
+
+
+def _enqueue(state: Dict[str, Any]):
+    """Track a queued job and wake the dispatcher (caller holds _cond)"""
+    _states[state["id"]] = state
+    _contexts[state["id"]] = JobContext(state["id"])
+    heapq.heappush(_queue, (-state["priority"], next(_sequence), state["id"]))
+    _cond.notify_all()
+
+
+def start_scheduler():
+    """Start worker pools and re-queue jobs left unfinished by a previous run"""
+    global _thread_pool, _process_pool, _dispatcher, _stopping
+    _stopping = False
+    _thread_pool = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+    _process_pool = ProcessPoolExecutor(max_workers=JOB_CPU_WORKERS)
+
+    db = SessionLocal()
+    try:
+        unfinished = (
+            db.query(Job)
+            .filter(Job.status.in_(["queued", "running"]))
+            .order_by(Job.created_at)
+            .all()
+        )
+        for job in unfinished:
+            if job.cancel_requested:
+                job.status = "cancelled"
+                job.finished_at = datetime.utcnow()
+            elif job.type not in JOB_TYPES:
+                job.status = "failed"
+                job.error = f"Unknown job type: {job.type}"
+                job.finished_at = datetime.utcnow()
+            else:
+                job.status = "queued"
+                job.started_at = None
+        db.commit()
+        requeue = [_job_dict(job) for job in unfinished if job.status == "queued"]
+    finally:
+        db.close()
+
+    with _cond:
+        for state in requeue:
+            _enqueue(state)
+
+    _dispatcher = threading.Thread(target=_dispatch_loop, name="job-dispatcher", daemon=True)
+    _dispatcher.start()
+
+
+def stop_scheduler():
+    """Stop dispatching and interrupt running jobs; they resume on next startup"""
+    global _stopping
+    with _cond:
+        _stopping = True
+        for ctx in _contexts.values():
+            ctx._cancel.set()
+        _cond.notify_all()
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=True, cancel_futures=True)
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+def submit_job(job_type_name: str, params: Optional[Dict[str, Any]] = None, priority: int = 0) -> Dict[str, Any]:
+    """
+    Persist a new job and queue it
+
+    Args:
+        job_type_name: Registered job type
+        params: Handler parameters
+        priority: Higher values run first
+
+    Returns:
+        Job dict matching schemas.JobOut
+    """
+    if job_type_name not in JOB_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown job type: {job_type_name}")
+
+    job = Job(
+        id=str(uuid.uuid4()),
+        type=job_type_name,
+        status="queued",
+        priority=priority,
+        params=params or {},
+        progress_done=0,
+        cancel_requested=False,
+        created_at=datetime.utcnow(),
+    )
+    db = SessionLocal()
+    try:
+        db.add(job)
+        db.commit()
+        state = _job_dict(job)
+    finally:
+        db.close()
+
+    with _cond:
+        _enqueue(state)
+        return dict(state)
+
+
+def get_job(job_id: str) -> Dict[str, Any]:
+    """
+    Get a job's current state, from memory while it is active
+
+    Args:
+        job_id: Job identifier
+
+    Returns:
+        Job dict matching schemas.JobOut
+    """
+    with _cond:
+        state = _states.get(job_id)
+        if state is not None:
+            return dict(state)
+
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return _job_dict(job)
+    finally:
+        db.close()
+
+
+def list_jobs(status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    List recent jobs, newest first
+
+    Args:
+        status: Only return jobs with this status
+        limit: Maximum number of jobs
+
+    Returns:
+        List of job dicts
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(Job)
+        if status:
+            query = query.filter(Job.status == status)
+        jobs = [_job_dict(job) for job in query.order_by(Job.created_at.desc()).limit(limit)]
+    finally:
+        db.close()
+
+    # Prefer live progress over the throttled database copy
+    with _cond:
+        return [dict(_states.get(job["id"], job)) for job in jobs]
+
+
+def cancel_job(job_id: str) -> Dict[str, Any]:
+    """
+    Cancel a queued job immediately, or ask a running job to stop
+
+    Args:
+        job_id: Job identifier
+
+    Returns:
+        Job dict after the request
+    """
+    with _cond:
+        state = _states.get(job_id)
+        ctx = _contexts.get(job_id)
+        if state is not None:
+            fields: Dict[str, Any] = {"cancel_requested": True}
+            if state["status"] == "queued":
+                fields.update(status="cancelled", finished_at=datetime.utcnow())
+                _states.pop(job_id, None)
+                _contexts.pop(job_id, None)
+            else:
+                ctx._cancel_requested = True
+                ctx._cancel.set()
+            state.update(fields)
+            state = dict(state)
+
+    if state is None:
+        # Not scheduled in this process; record the request for recovery
+        job = get_job(job_id)
+        if job["status"] not in TERMINAL_STATUSES:
+            _persist(job_id, {"cancel_requested": True})
+            job["cancel_requested"] = True
+        return job
+
+    _persist(job_id, fields)
+    return state
+
+
+# =============================================================================
+# JOB TYPES
+# =============================================================================
+
+@job_type("verify_pdfs", max_concurrency=1)
+def verify_pdfs(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Re-verify every stored PDF on disk. With {"fix": true}, clear pdf_path
+    for papers whose file is missing.
+    """
+    fix = bool(params.get("fix", False))
+
+    db = SessionLocal()
+    try:
+        paper_ids = [paper_id for (paper_id,) in db.query(Paper.id).filter(Paper.pdf_path.isnot(None))]
+    finally:
+        db.close()
+
+    total = len(paper_ids)
+    ctx.report(0, total, f"Checking {total} PDFs")
+    # Pairs rather than a path -> id map: distinct IDs can sanitize to the same file
+    papers = ((paper_id, get_pdf_path(paper_id)) for paper_id in paper_ids)
+
+    counts = {"ok": 0, "missing": 0, "corrupt": 0}
+    problems = []
+    for done, (paper_id, info) in enumerate(ctx.map_cpu(inspect_pdf, papers), start=1):
+        counts[info["status"]] += 1
+        if info["status"] != "ok":
+            problems.append({"paper_id": paper_id, **info})
+        ctx.report(done, total)
+
+    fixed = 0
+    missing_ids = [problem["paper_id"] for problem in problems if problem["status"] == "missing"]
+    if fix and missing_ids:
+        ctx.check_cancelled()
+        db = SessionLocal()
+        try:
+            fixed = (
+                db.query(Paper)
+                .filter(Paper.id.in_(missing_ids))
+                .update({Paper.pdf_path: None, Paper.pdf_version: None}, synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    # The library may already be changed, so finish without a cancellation check
+    _update(ctx.job_id, progress_done=total, progress_total=total, message="Done")
+    return {"checked": total, **counts, "fixed": fixed, "problems": problems}
@@ -1,16 +1,31 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, ORJSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Optional
+from sqlalchemy import text
 from sqlalchemy.orm import Session
+import asyncio
+import orjson
 import os
 
 from services.search import search_openalex
 from services.citation import generate_apa_citation, generate_mla_citation, generate_chicago_citation
 from database import get_db, engine, Base
-from models import Paper, Tag, Note, paper_tags
+from models import Paper, Tag, Note, NoteRevision, paper_tags
+from schemas import PaperOut, TagOut, NoteOut, NotePatch, NoteRevisionOut, NoteRevisionContent, JobCreate, JobOut
+from queries import list_papers, list_tags
 from pdf_storage import save_pdf, get_pdf_path, pdf_exists, delete_pdf
+from pdf_preview import PageKey, get_page_key, get_page_image, pdf_version, shutdown_executor, THUMBNAIL_WIDTH, PREVIEW_WIDTH
+from note_versions import (
+    get_current_note, stage_note, flush_all_notes, discard_pending_note,
+    list_revisions, get_revision_content,
+)
+from jobs import (
+    JOB_TYPES, TERMINAL_STATUSES, start_scheduler, stop_scheduler,
+    submit_job, get_job, list_jobs, cancel_job,
+)
 
 app = FastAPI(title="Academic Research Agent", version="1.0.0")
 
@@ -88,20 +103,39 @@ def cite_paper_chicago(paper: SearchResult):
 def init_db():
     """Initialize database tables on startup"""
     Base.metadata.create_all(bind=engine)
+    # create_all does not add columns to existing tables
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE notes ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(text("ALTER TABLE papers ADD COLUMN IF NOT EXISTS pdf_version VARCHAR"))
+
+
+@app.on_event("startup")
+def start_jobs():
+    """Start the background job scheduler (after tables exist)"""
+    start_scheduler()
+
+
+@app.on_event("shutdown")
+def stop_workers():
+    """Stop background worker pools and write buffered notes on shutdown"""
+    shutdown_executor()
+    stop_scheduler()
+    flush_all_notes()
 
 
 # =============================================================================
 # PAPERS API
 # =============================================================================
 
-@app.get("/api/papers")
+@app.get("/api/papers", response_model=List[PaperOut])
 def get_papers(db: Session = Depends(get_db)):
-    """Get all saved papers with tags and notes"""
-    papers = db.query(Paper).all()
-    return papers
+    """Get all saved papers with their tags"""
+    # Rows are fetched as tuples and rendered with orjson, bypassing
+    # per-object jsonable_encoder reflection on large libraries
+    return ORJSONResponse(list_papers(db))
 
 
-@app.post("/api/papers")
+@app.post("/api/papers", response_model=PaperOut)
 def create_paper(paper_data: dict, db: Session = Depends(get_db)):
     """Save a new paper"""
     paper = Paper(**paper_data)
@@ -122,6 +156,7 @@ def delete_paper(paper_id: str, db: Session = Depends(get_db)):
     if paper.pdf_path:
         delete_pdf(paper_id)
     
+    discard_pending_note(paper_id)
     db.delete(paper)
     db.commit()
     return {"status": "deleted", "id": paper_id}
@@ -131,14 +166,13 @@ def delete_paper(paper_id: str, db: Session = Depends(get_db)):
 # TAGS API
 # =============================================================================
 
-@app.get("/api/tags")
+@app.get("/api/tags", response_model=List[TagOut])
 def get_tags(db: Session = Depends(get_db)):
     """Get all tags"""
-    tags = db.query(Tag).all()
-    return tags
+    return ORJSONResponse(list_tags(db))
 
 
-@app.post("/api/tags")
+@app.post("/api/tags", response_model=TagOut)
 def create_tag(tag_data: dict, db: Session = Depends(get_db)):
     """Create a new tag"""
     tag = Tag(**tag_data)
@@ -196,47 +230,64 @@ def remove_tag_from_paper(paper_id: str, tag_id: str, db: Session = Depends(get_
 # NOTES API
 # =============================================================================
 
-@app.get("/api/notes/{paper_id}")
+@app.get("/api/notes/{paper_id}", response_model=NoteOut)
 def get_note(paper_id: str, db: Session = Depends(get_db)):
     """Get note for a specific paper"""
-    note = db.query(Note).filter(Note.paper_id == paper_id).first()
-    if not note:
-        return {"paper_id": paper_id, "content": "", "updated_at": None}
-    return note
+    return get_current_note(db, paper_id)
 
 
-@app.post("/api/notes/{paper_id}")
+@app.post("/api/notes/{paper_id}", response_model=NoteOut)
 def save_note(paper_id: str, note_data: dict, db: Session = Depends(get_db)):
-    """Save or update a note for a paper"""
-    note = db.query(Note).filter(Note.paper_id == paper_id).first()
-    
-    if note:
-        # Update existing note
-        note.content = note_data.get("content", "")
-        from datetime import datetime
-        note.updated_at = datetime.utcnow()
-    else:
-        # Create new note
-        note = Note(paper_id=paper_id, content=note_data.get("content", ""))
-        db.add(note)
-    
-    db.commit()
-    db.refresh(note)
-    return note
+    """Save or update a note for a paper (optionally checked against `base_version`)"""
+    return stage_note(
+        db,
+        paper_id,
+        content=note_data.get("content", ""),
+        base_version=note_data.get("base_version"),
+    )
+
+
+@app.patch("/api/notes/{paper_id}", response_model=NoteOut)
+def patch_note(paper_id: str, patch: NotePatch, db: Session = Depends(get_db)):
+    """Apply a delta to a note, rejecting it with 409 if the note has moved past `base_version`"""
+    return stage_note(db, paper_id, delta=patch.delta, base_version=patch.base_version)
 
 
 @app.delete("/api/notes/{paper_id}")
 def delete_note(paper_id: str, db: Session = Depends(get_db)):
-    """Delete a note"""
+    """Delete a note and its revision history"""
+    had_pending = discard_pending_note(paper_id)
     note = db.query(Note).filter(Note.paper_id == paper_id).first()
-    if not note:
+    if not note and not had_pending:
         raise HTTPException(status_code=404, detail="Note not found")
     
-    db.delete(note)
+    if note:
+        db.delete(note)
+    db.query(NoteRevision).filter(NoteRevision.paper_id == paper_id).delete()
     db.commit()
     return {"status": "deleted", "paper_id": paper_id}
 
 
+@app.get("/api/notes/{paper_id}/revisions", response_model=List[NoteRevisionOut])
+def get_note_revisions(paper_id: str, db: Session = Depends(get_db)):
+    """List saved revisions of a note, newest first"""
+    return list_revisions(db, paper_id)
+
+
+@app.get("/api/notes/{paper_id}/revisions/{version}", response_model=NoteRevisionContent)
+def get_note_revision(paper_id: str, version: int, db: Session = Depends(get_db)):
+    """Get a note's content as it was at a given revision"""
+    content = get_revision_content(db, paper_id, version)
+    return {"paper_id": paper_id, "version": version, "content": content}
+
+
+@app.post("/api/notes/{paper_id}/revisions/{version}/restore", response_model=NoteOut)
+def restore_note_revision(paper_id: str, version: int, db: Session = Depends(get_db)):
+    """Restore a previous revision by saving its content as a new version"""
+    content = get_revision_content(db, paper_id, version)
+    return stage_note(db, paper_id, content=content)
+
+
 # =============================================================================
 # PDF STORAGE API
 # =============================================================================
@@ -266,12 +317,14 @@ async def upload_pdf(
     
     # Update paper record
     paper.pdf_path = pdf_path
+    paper.pdf_version = await run_in_threadpool(pdf_version, paper_id)
     db.commit()
     
     return {
         "status": "uploaded",
         "paper_id": paper_id,
         "pdf_url": pdf_path,
+        "pdf_version": paper.pdf_version,
         "filename": file.filename
     }
 
@@ -290,6 +343,37 @@ async def download_pdf(paper_id: str):
     )
 
 
+async def _image_response(request: Request, key: PageKey, v: Optional[str]) -> Response:
+    """
+    Serve a rendered page image. URLs carrying the current PDF version (`v`)
+    are cached for a long time; others must revalidate against the ETag.
+    """
+    headers = {"ETag": f'"{key.cache_key}"'}
+    if v == key.version:
+        headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        headers["Cache-Control"] = "no-cache"
+    # Answer conditional requests before reading or rendering anything
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    data = await get_page_image(key)
+    return Response(content=data, media_type="image/jpeg", headers=headers)
+
+
+@app.get("/api/pdfs/thumbnail")
+async def pdf_thumbnail(request: Request, paper_id: str, v: Optional[str] = None):
+    """Get a small first-page thumbnail of a PDF (accepts ID via query param)"""
+    key = await get_page_key(paper_id, page=1, width=THUMBNAIL_WIDTH)
+    return await _image_response(request, key, v)
+
+
+@app.get("/api/pdfs/preview")
+async def pdf_page_preview(request: Request, paper_id: str, page: int = 1, width: int = PREVIEW_WIDTH, v: Optional[str] = None):
+    """Get a rendered preview of a single PDF page (accepts ID via query param)"""
+    key = await get_page_key(paper_id, page=page, width=width)
+    return await _image_response(request, key, v)
+
+
 @app.delete("/api/pdfs/{paper_id}")
 def delete_pdf_endpoint(paper_id: str, db: Session = Depends(get_db)):
     """Delete a PDF file"""
@@ -297,6 +381,7 @@ def delete_pdf_endpoint(paper_id: str, db: Session = Depends(get_db)):
     paper = db.query(Paper).filter(Paper.id == paper_id).first()
     if paper:
         paper.pdf_path = None
+        paper.pdf_version = None
         db.commit()
     
     # Delete file
@@ -304,3 +389,67 @@ def delete_pdf_endpoint(paper_id: str, db: Session = Depends(get_db)):
         return {"status": "deleted", "paper_id": paper_id}
     else:
         raise HTTPException(status_code=404, detail="PDF not found")
+
+
+# =============================================================================
+# JOBS API
+# =============================================================================
+
+JOB_EVENT_INTERVAL = 0.5
+
+
+@app.get("/api/jobs/types")
+def get_job_types():
+    """List available job types"""
+    return [
+        {"type": name, "description": job_type.description, "max_concurrency": job_type.max_concurrency}
+        for name, job_type in JOB_TYPES.items()
+    ]
+
+
+@app.post("/api/jobs", response_model=JobOut)
+def create_job(job_data: JobCreate):
+    """Submit a background job"""
+    return submit_job(job_data.type, job_data.params, job_data.priority)
+
+
+@app.get("/api/jobs", response_model=List[JobOut])
+def get_jobs(status: Optional[str] = None, limit: int = 50):
+    """List recent jobs, newest first"""
+    return list_jobs(status, limit)
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobOut)
+def get_job_status(job_id: str):
+    """Get a job's status and progress"""
+    return get_job(job_id)
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Stream job status updates as server-sent events until the job finishes"""
+    job = await run_in_threadpool(get_job, job_id)
+
+    async def events():
+        nonlocal job
+        last = None
+        while True:
+            if job != last:
+                yield f"data: {orjson.dumps(job).decode()}\n\n"
+                last = job
+            if job["status"] in TERMINAL_STATUSES:
+                break
+            await asyncio.sleep(JOB_EVENT_INTERVAL)
+            job = await run_in_threadpool(get_job, job_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/jobs/{job_id}/cancel", response_model=JobOut)
+def cancel_job_endpoint(job_id: str):
+    """Cancel a queued job, or ask a running job to stop"""
+    return cancel_job(job_id)
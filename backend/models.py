@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Text, TIMESTAMP, ForeignKey, Table
+from sqlalchemy import Column, String, Integer, Text, TIMESTAMP, ForeignKey, Table, UniqueConstraint, Boolean
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from database import Base
@@ -31,6 +31,7 @@ class Paper(Base):
     url = Column(Text)
     abstract = Column(Text)
     pdf_path = Column(String)  # Path to PDF file: /pdfs/abc123.pdf
+    pdf_version = Column(String)  # Content token of the PDF, used to version preview URLs
     created_at = Column(TIMESTAMP, default=datetime.utcnow)
     
     # Relationships
@@ -61,7 +62,46 @@ class Note(Base):
     
     paper_id = Column(String, ForeignKey('papers.id', ondelete='CASCADE'), primary_key=True)
     content = Column(Text)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
     updated_at = Column(TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     paper = relationship("Paper", back_populates="note")
+
+
+class NoteRevision(Base):
+    """
+    Saved revision of a note. Most revisions store a compact delta against the
+    previous revision; every few revisions a full snapshot is stored instead.
+    """
+    __tablename__ = "note_revisions"
+    __table_args__ = (UniqueConstraint('paper_id', 'version'),)
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    paper_id = Column(String, ForeignKey('papers.id', ondelete='CASCADE'), nullable=False, index=True)
+    version = Column(Integer, nullable=False)
+    snapshot = Column(Text)  # Full content, or NULL for delta revisions
+    delta = Column(JSONB)  # Edit ops: [12, -3, "new text", 40] (retain / delete / insert)
+    created_at = Column(TIMESTAMP, default=datetime.utcnow)
+
+
+class Job(Base):
+    """
+    Background job run by the in-process scheduler
+    """
+    __tablename__ = "jobs"
+    
+    id = Column(String, primary_key=True)
+    type = Column(String, nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued", index=True)  # queued, running, succeeded, failed, cancelled
+    priority = Column(Integer, nullable=False, default=0)  # Higher runs first
+    params = Column(JSONB)
+    progress_done = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer)
+    message = Column(Text)
+    result = Column(JSONB)
+    error = Column(Text)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    created_at = Column(TIMESTAMP, default=datetime.utcnow)
+    started_at = Column(TIMESTAMP)
+    finished_at = Column(TIMESTAMP)
@@ -0,0 +1,467 @@
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Note, NoteRevision, Paper
+
+# Saves arriving within this window are coalesced into a single database write
+NOTE_COALESCE_SECONDS = float(os.getenv("NOTE_COALESCE_SECONDS", "2.0"))
+# Delay before retrying a buffered note whose write failed
+NOTE_RETRY_SECONDS = float(os.getenv("NOTE_RETRY_SECONDS", "5.0"))
+# Store a full snapshot every N revisions so history never replays long delta chains
+NOTE_SNAPSHOT_INTERVAL = int(os.getenv("NOTE_SNAPSHOT_INTERVAL", "20"))
+
+Delta = List[Union[int, str]]
+
+
+# =============================================================================
+# DELTAS
+# =============================================================================
+
+def make_delta(old: str, new: str) -> Delta:
+    """
+    Compute a compact edit script turning `old` into `new`
+
+    Ops are applied left to right: a positive int retains that many
+    characters, a negative int deletes that many, and a string is inserted.
+    Lengths count Unicode code points (Python str indexing); clients must
+    count the same way, not in UTF-16 code units.
+
+    Args:
+        old: Previous content
+        new: Updated content
+
+    Returns:
+        List of delta ops
+    """
+    # Trim the common prefix/suffix first; typical edits touch a small region
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+
+    old_mid = old[prefix:len(old) - suffix]
+    new_mid = new[prefix:len(new) - suffix]
+
+    ops: Delta = []
+
+    def push(op: Union[int, str]):
+        # Merge adjacent ops of the same kind
+        if ops and type(ops[-1]) is type(op) and (isinstance(op, str) or (ops[-1] > 0) == (op > 0)):
+            ops[-1] += op
+        elif op:
+            ops.append(op)
+
+    push(prefix)
+    matcher = SequenceMatcher(None, old_mid, new_mid, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            push(i2 - i1)
+            continue
+        if i2 > i1:
+            push(-(i2 - i1))
+        if j2 > j1:
+            push(new_mid[j1:j2])
+    push(suffix)
+    return ops
+
+
+def apply_delta(old: str, delta: Delta) -> str:
+    """
+    Apply delta ops produced by make_delta
+
+    Args:
+        old: Content the delta was computed against
+        delta: List of delta ops
+
+    Returns:
+        Updated content
+
+    Raises:
+        ValueError: If the delta does not cover `old` exactly
+    """
+    parts = []
+    pos = 0
+    for op in delta:
+        if isinstance(op, str):
+            parts.append(op)
+        elif isinstance(op, int) and not isinstance(op, bool):
+            count = abs(op)
+            if pos + count > len(old):
+                raise ValueError("Delta runs past the end of the note")
+            if op > 0:
+                parts.append(old[pos:pos + count])
+            pos += count
+        else:
+            raise ValueError(f"Invalid delta op: {op!r}")
+    if pos != len(old):
+        raise ValueError("Delta does not cover the whole note")
+    return "".join(parts)
+
+
+# =============================================================================
+# WRITE COALESCING
+# =============================================================================
+
+@dataclass
+class _PendingNote:
+    content: str
+    version: int
+    updated_at: datetime
+    timer: Optional[threading.Timer] = None
+    flushing: bool = False  # A database write of this entry is in progress
+    flush_done: threading.Event = field(default_factory=threading.Event)  # Set when no write is in progress
+
+
+# Accepted but not yet persisted saves, keyed by paper_id. An entry stays
+# here until its content is committed, so it is always the newest state.
+_pending: Dict[str, _PendingNote] = {}
+# Guards _pending and _commits only; never held across database I/O
+_lock = threading.Lock()
+# Bumped on every committed flush, so readers can detect a stale database read
+_commits = 0
+
+
+def _note_dict(paper_id: str, content: str, version: int, updated_at: Optional[datetime]) -> Dict[str, Any]:
+    return {"paper_id": paper_id, "content": content, "version": version, "updated_at": updated_at}
+
+
+def _pending_dict(paper_id: str, pending: _PendingNote) -> Dict[str, Any]:
+    return _note_dict(paper_id, pending.content, pending.version, pending.updated_at)
+
+
+def _schedule_flush(paper_id: str, pending: _PendingNote, delay: float):
+    """Start the flush timer for a pending entry (caller holds _lock)"""
+    timer = threading.Timer(delay, flush_note, args=(paper_id,))
+    timer.daemon = True
+    pending.timer = timer
+    timer.start()
+
+
+def _read_stored_note(db: Session, paper_id: str, require_paper: bool = False) -> Dict[str, Any]:
+    """Read a note from the database, optionally checking that its paper exists"""
+    note = db.query(Note).filter(Note.paper_id == paper_id).first()
+    if note:
+        return _note_dict(paper_id, note.content or "", note.version or 0, note.updated_at)
+    if require_paper and not db.query(Paper.id).filter(Paper.id == paper_id).first():
+        raise HTTPException(status_code=404, detail="Paper not found")
+    return _note_dict(paper_id, "", 0, None)
+
+
+def get_current_note(db: Session, paper_id: str) -> Dict[str, Any]:
+    """
+    Get the latest accepted state of a note, including unflushed saves
+
+    Args:
+        db: Database session
+        paper_id: Unique paper identifier
+
+    Returns:
+        Note dict matching schemas.NoteOut
+    """
+    with _lock:
+        pending = _pending.get(paper_id)
+        if pending:
+            return _pending_dict(paper_id, pending)
+    return _read_stored_note(db, paper_id)
+
+
+def stage_note(
+    db: Session,
+    paper_id: str,
+    content: Optional[str] = None,
+    delta: Optional[Delta] = None,
+    base_version: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Accept a note save and schedule it to be written
+
+    The first save in a window starts a timer; later saves in the same
+    window only replace the buffered content, so the whole burst costs one
+    database write.
+
+    Args:
+        db: Database session
+        paper_id: Unique paper identifier
+        content: Full new content (ignored if `delta` is given)
+        delta: Delta ops against the version in `base_version`
+        base_version: Version the client edited; None skips the check
+
+    Returns:
+        Note dict with the new version
+    """
+    while True:
+        with _lock:
+            pending = _pending.get(paper_id)
+            commits = _commits
+        # Nothing buffered: read the stored note without holding the lock
+        stored = None if pending else _read_stored_note(db, paper_id, require_paper=True)
+
+        with _lock:
+            # Start over if another save or flush landed while we were reading
+            if _pending.get(paper_id) is not pending or (pending is None and _commits != commits):
+                continue
+            current = _pending_dict(paper_id, pending) if pending else stored
+
+            if base_version is not None and base_version != current["version"]:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Note has changed (current version {current['version']}, got {base_version})"
+                )
+
+            new_content = content
+            if delta is not None:
+                try:
+                    new_content = apply_delta(current["content"], delta)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+            new_content = new_content or ""
+
+            if new_content == current["content"] and current["updated_at"] is not None:
+                return current
+
+            version = current["version"] + 1
+            updated_at = datetime.utcnow()
+            if pending:
+                pending.content = new_content
+                pending.version = version
+                pending.updated_at = updated_at
+            else:
+                pending = _PendingNote(new_content, version, updated_at)
+                _pending[paper_id] = pending
+                _schedule_flush(paper_id, pending, NOTE_COALESCE_SECONDS)
+
+            return _pending_dict(paper_id, pending)
+
+
+def _add_revision(db: Session, paper_id: str, previous: str, content: str, version: int, created_at: datetime):
+    """Record a revision as a delta, or as a snapshot when one is due"""
+    existing = db.query(func.count(NoteRevision.id)).filter(NoteRevision.paper_id == paper_id).scalar()
+    revision = NoteRevision(paper_id=paper_id, version=version, created_at=created_at)
+
+    if existing % NOTE_SNAPSHOT_INTERVAL == 0:
+        revision.snapshot = content
+    else:
+        delta = make_delta(previous, content)
+        if len(json.dumps(delta)) >= len(content):
+            revision.snapshot = content
+        else:
+            revision.delta = delta
+    db.add(revision)
+
+
+def _paper_exists(paper_id: str) -> bool:
+    """Check whether a paper still exists (assumes yes if the check itself fails)"""
+    db = SessionLocal()
+    try:
+        return db.query(Paper.id).filter(Paper.id == paper_id).first() is not None
+    except Exception:
+        return True
+    finally:
+        db.close()
+
+
+def _write_note(paper_id: str, content: str, version: int, updated_at: datetime) -> bool:
+    """Write a note and its revision in one transaction; returns True on commit"""
+    db = SessionLocal()
+    try:
+        note = db.query(Note).filter(Note.paper_id == paper_id).first()
+        previous = (note.content or "") if note else ""
+        if not note:
+            note = Note(paper_id=paper_id)
+            db.add(note)
+        note.content = content
+        note.version = version
+        note.updated_at = updated_at
+        _add_revision(db, paper_id, previous, content, version, updated_at)
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"Failed to save note for {paper_id}: {str(e)}")
+        return False
+    finally:
+        db.close()
+
+
+def flush_note(paper_id: str, wait: bool = False):
+    """
+    Write a note's buffered content and revision to the database
+
+    Saves accepted while the write is in progress stay buffered for the next
+    flush. A failed write keeps the entry and retries after NOTE_RETRY_SECONDS,
+    unless the paper has been deleted.
+
+    Args:
+        paper_id: Unique paper identifier
+        wait: If another thread is already writing this note, wait for it,
+            and keep flushing until every accepted save is committed (or a
+            write fails). Without it, an in-progress write is left alone.
+    """
+    global _commits
+    while True:
+        with _lock:
+            pending = _pending.get(paper_id)
+            if not pending:
+                return
+            if pending.flushing:
+                if not wait:
+                    return
+                in_progress = pending.flush_done
+            else:
+                in_progress = None
+                if pending.timer:
+                    pending.timer.cancel()
+                    pending.timer = None
+                pending.flushing = True
+                pending.flush_done.clear()
+                content, version, updated_at = pending.content, pending.version, pending.updated_at
+
+        if in_progress is not None:
+            in_progress.wait()
+            continue
+
+        committed = False
+        try:
+            committed = _write_note(paper_id, content, version, updated_at)
+            paper_exists = committed or _paper_exists(paper_id)
+            with _lock:
+                if committed:
+                    _commits += 1
+                if _pending.get(paper_id) is not pending:
+                    # Discarded while writing; the deleter waits on flush_done
+                    # and removes what this write committed
+                    return
+                if committed and pending.version == version:
+                    del _pending[paper_id]
+                elif not paper_exists:
+                    del _pending[paper_id]
+                    print(f"Dropped buffered note for deleted paper {paper_id}")
+                elif not wait:
+                    # Newer saves arrived during the write, or the write failed
+                    _schedule_flush(paper_id, pending, NOTE_COALESCE_SECONDS if committed else NOTE_RETRY_SECONDS)
+                elif not committed:
+                    _schedule_flush(paper_id, pending, NOTE_RETRY_SECONDS)
+        finally:
+            with _lock:
+                pending.flushing = False
+            pending.flush_done.set()
+
+        if not (wait and committed):
+            return
+
+
+def flush_all_notes():
+    """Write every buffered note (called on application shutdown)"""
+    with _lock:
+        paper_ids = list(_pending)
+    for paper_id in paper_ids:
+        flush_note(paper_id, wait=True)
+
+
+def discard_pending_note(paper_id: str) -> bool:
+    """
+    Drop a buffered save, e.g. because the note or paper is being deleted
+
+    If the note is being written, waits for that write to finish so the
+    caller's delete also removes whatever it committed.
+
+    Returns:
+        True if there was a buffered save, False otherwise
+    """
+    with _lock:
+        pending = _pending.pop(paper_id, None)
+        if pending is None:
+            return False
+        if pending.timer:
+            pending.timer.cancel()
+        in_progress = pending.flush_done if pending.flushing else None
+    if in_progress is not None:
+        in_progress.wait()
+    return True
+
+
+# =============================================================================
+# HISTORY
+# =============================================================================
+
+def list_revisions(db: Session, paper_id: str) -> List[Dict[str, Any]]:
+    """
+    List saved revisions of a note, newest first
+
+    Args:
+        db: Database session
+        paper_id: Unique paper identifier
+
+    Returns:
+        List of revision summaries
+    """
+    flush_note(paper_id, wait=True)
+    rows = (
+        db.query(NoteRevision.version, NoteRevision.created_at, NoteRevision.snapshot.isnot(None))
+        .filter(NoteRevision.paper_id == paper_id)
+        .order_by(NoteRevision.version.desc())
+        .all()
+    )
+    return [
+        {"version": version, "created_at": created_at, "kind": "snapshot" if is_snapshot else "delta"}
+        for version, created_at, is_snapshot in rows
+    ]
+
+
+def get_revision_content(db: Session, paper_id: str, version: int) -> str:
+    """
+    Rebuild a note as it was at `version` from the nearest snapshot
+
+    Args:
+        db: Database session
+        paper_id: Unique paper identifier
+        version: Revision version
+
+    Returns:
+        Note content at that version
+    """
+    flush_note(paper_id, wait=True)
+    snapshot = (
+        db.query(NoteRevision)
+        .filter(
+            NoteRevision.paper_id == paper_id,
+            NoteRevision.version <= version,
+            NoteRevision.snapshot.isnot(None),
+        )
+        .order_by(NoteRevision.version.desc())
+        .first()
+    )
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Revision not found")
+
+    content = snapshot.snapshot
+    last_version = snapshot.version
+    deltas = (
+        db.query(NoteRevision.version, NoteRevision.delta)
+        .filter(
+            NoteRevision.paper_id == paper_id,
+            NoteRevision.version > snapshot.version,
+            NoteRevision.version <= version,
+        )
+        .order_by(NoteRevision.version)
+        .all()
+    )
+    for last_version, delta in deltas:
+        content = apply_delta(content, delta)
+
+    if last_version != version:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return content
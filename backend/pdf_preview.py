@@ -0,0 +1,273 @@
+import asyncio
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from pdf_storage import get_pdf_path, pdf_exists
+
+# Rendered preview cache directory and size budget
+PREVIEW_CACHE_DIR = os.getenv("PREVIEW_CACHE_DIR", "/app/data/previews")
+PREVIEW_CACHE_MAX_BYTES = int(os.getenv("PREVIEW_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+PREVIEW_WORKERS = int(os.getenv("PREVIEW_WORKERS", "2"))
+os.makedirs(PREVIEW_CACHE_DIR, exist_ok=True)
+
+THUMBNAIL_WIDTH = 200
+PREVIEW_WIDTH = 900
+MAX_PREVIEW_WIDTH = 2000
+# Length of the content digest prefix used as a PDF's URL version token
+PDF_VERSION_LENGTH = 16
+# Once over budget, evict down to this fraction so eviction scans stay rare
+PREVIEW_CACHE_LOW_WATER = 0.9
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# path -> (mtime, size, sha256 of file content), so unchanged PDFs are hashed once.
+# Keyed by path so lookups and replacements are single dict operations.
+_digest_memo: Dict[str, Tuple[float, int, str]] = {}
+
+# Renders currently in progress, keyed by cache key
+_inflight: Dict[str, "asyncio.Future[bytes]"] = {}
+
+_cache_lock = threading.Lock()
+_cache_size: Optional[int] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Create the render worker pool on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=PREVIEW_WORKERS)
+        return _executor
+
+
+def shutdown_executor():
+    """Stop the render worker pool (called on application shutdown)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _render_page(pdf_path: str, page_index: int, width: int) -> bytes:
+    """
+    Render a single PDF page to JPEG bytes. Runs inside a worker process.
+
+    Args:
+        pdf_path: Absolute path to the PDF file
+        page_index: Zero-based page number
+        width: Target image width in pixels
+
+    Returns:
+        Encoded JPEG image
+    """
+    from poppler import load_from_file, PageRenderer
+    from PIL import Image
+
+    document = load_from_file(pdf_path)
+    if page_index < 0 or page_index >= document.pages:
+        raise IndexError(f"Page {page_index + 1} out of range (document has {document.pages} pages)")
+
+    page = document.create_page(page_index)
+    page_width = page.page_rect().width or 612
+    dpi = 72.0 * width / page_width
+
+    renderer = PageRenderer()
+    image = renderer.render_page(page, xres=dpi, yres=dpi)
+    pil_image = Image.frombytes(
+        "RGBA", (image.width, image.height), image.data, "raw", str(image.format)
+    ).convert("RGB")
+
+    buffer = io.BytesIO()
+    pil_image.save(buffer, format="JPEG", quality=80, optimize=True)
+    return buffer.getvalue()
+
+
+def _content_digest(pdf_path: str) -> str:
+    """
+    Hash a PDF's content, reusing the previous hash while the file is unchanged
+
+    Args:
+        pdf_path: Absolute path to the PDF file
+
+    Returns:
+        Hex sha256 digest of the file
+    """
+    stat = os.stat(pdf_path)
+    memo = _digest_memo.get(pdf_path)
+    if memo is not None and memo[:2] == (stat.st_mtime, stat.st_size):
+        return memo[2]
+
+    hasher = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    digest = hasher.hexdigest()
+    _digest_memo[pdf_path] = (stat.st_mtime, stat.st_size, digest)
+    return digest
+
+
+def pdf_version(paper_id: str) -> str:
+    """
+    Short content token for a paper's PDF, used to version preview URLs
+
+    Args:
+        paper_id: Unique paper identifier
+
+    Returns:
+        Hex prefix of the PDF's content digest
+    """
+    return _content_digest(get_pdf_path(paper_id))[:PDF_VERSION_LENGTH]
+
+
+def _cache_path(cache_key: str) -> str:
+    return os.path.join(PREVIEW_CACHE_DIR, f"{cache_key}.jpg")
+
+
+def _current_cache_size() -> int:
+    """Total bytes in the cache directory, scanned once and then tracked in memory"""
+    global _cache_size
+    if _cache_size is None:
+        _cache_size = sum(
+            entry.stat().st_size
+            for entry in os.scandir(PREVIEW_CACHE_DIR)
+            if entry.is_file() and entry.name.endswith(".jpg")
+        )
+    return _cache_size
+
+
+def _read_cached(cache_key: str) -> Optional[bytes]:
+    """Return a cached image and mark it as recently used"""
+    path = _cache_path(cache_key)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)
+        return data
+    except FileNotFoundError:
+        return None
+
+
+def _write_cached(cache_key: str, data: bytes):
+    """Store an image in the cache, evicting least recently used entries if over budget"""
+    global _cache_size
+    path = _cache_path(cache_key)
+    tmp_path = f"{path}.tmp"
+    with _cache_lock:
+        # Size before the write, excluding any entry this one replaces
+        size = _current_cache_size()
+        if os.path.exists(path):
+            size -= os.path.getsize(path)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        _cache_size = size + len(data)
+
+        if _cache_size <= PREVIEW_CACHE_MAX_BYTES:
+            return
+
+        # mtime is bumped on every hit, so oldest mtime == least recently used.
+        # Evicting to the low-water mark leaves headroom for many more renders
+        # before the next scan.
+        target = PREVIEW_CACHE_MAX_BYTES * PREVIEW_CACHE_LOW_WATER
+        entries = sorted(
+            (entry for entry in os.scandir(PREVIEW_CACHE_DIR)
+             if entry.is_file() and entry.name.endswith(".jpg")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in entries:
+            if _cache_size <= target:
+                break
+            if entry.path == path:
+                continue
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                _cache_size -= size
+            except FileNotFoundError:
+                pass
+
+
+@dataclass
+class PageKey:
+    pdf_path: str
+    page: int  # One-based
+    width: int
+    cache_key: str  # Also used as the ETag
+    version: str  # PDF version token, see pdf_version()
+
+
+async def get_page_key(paper_id: str, page: int = 1, width: int = PREVIEW_WIDTH) -> PageKey:
+    """
+    Resolve the cache key for a rendered page without reading or rendering it
+
+    Args:
+        paper_id: Unique paper identifier
+        page: One-based page number
+        width: Target image width in pixels
+
+    Returns:
+        PageKey identifying the rendered image
+    """
+    if not pdf_exists(paper_id):
+        raise HTTPException(status_code=404, detail="PDF not found")
+    if page < 1:
+        raise HTTPException(status_code=400, detail="Page must be 1 or greater")
+    width = max(50, min(width, MAX_PREVIEW_WIDTH))
+
+    pdf_path = get_pdf_path(paper_id)
+    digest = await asyncio.get_running_loop().run_in_executor(None, _content_digest, pdf_path)
+    return PageKey(pdf_path, page, width, f"{digest}-p{page}-w{width}", digest[:PDF_VERSION_LENGTH])
+
+
+async def get_page_image(key: PageKey) -> bytes:
+    """
+    Get a rendered JPEG of a PDF page, rendering it in the worker pool on a cache miss
+
+    Args:
+        key: Key returned by get_page_key
+
+    Returns:
+        Encoded JPEG image
+    """
+    cache_key = key.cache_key
+    loop = asyncio.get_running_loop()
+    data = await loop.run_in_executor(None, _read_cached, cache_key)
+    if data is not None:
+        return data
+
+    # Share one render between concurrent requests for the same image
+    pending = _inflight.get(cache_key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    pending = loop.create_future()
+    _inflight[cache_key] = pending
+    try:
+        try:
+            data = await loop.run_in_executor(_get_executor(), _render_page, key.pdf_path, key.page - 1, key.width)
+        except IndexError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except Exception as e:
+            print(f"Failed to render page {key.page} of {key.pdf_path}: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Failed to render PDF: {str(e)}")
+        await loop.run_in_executor(None, _write_cached, cache_key, data)
+        pending.set_result(data)
+        return data
+    except Exception as e:
+        pending.set_exception(e)
+        # Mark retrieved so failures without waiters don't log "exception never retrieved"
+        pending.exception()
+        raise
+    finally:
+        if not pending.done():
+            pending.cancel()
+        _inflight.pop(cache_key, None)
@@ -81,3 +81,25 @@ def delete_pdf(paper_id: str) -> bool:
         os.remove(pdf_path)
         return True
     return False
+
+
+def inspect_pdf(pdf_path: str) -> dict:
+    """
+    Check that a stored PDF exists and can be parsed
+    
+    Args:
+        pdf_path: Absolute path to PDF file
+        
+    Returns:
+        Dict with "status" ("ok", "missing" or "corrupt"), plus "pages"
+        when ok or "error" when corrupt
+    """
+    if not os.path.exists(pdf_path):
+        return {"status": "missing"}
+    
+    try:
+        from PyPDF2 import PdfReader
+        reader = PdfReader(pdf_path)
+        return {"status": "ok", "pages": len(reader.pages)}
+    except Exception as e:
+        return {"status": "corrupt", "error": str(e)}
@@ -0,0 +1,65 @@
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import Paper, Tag, paper_tags
+
+# Columns fetched for listings, in the order of the response schemas.
+# Selecting plain table columns returns lightweight row tuples and skips
+# the ORM loading layer (no per-row object hydration or identity map).
+_papers = Paper.__table__.c
+_tags = Tag.__table__.c
+PAPER_COLUMNS = (
+    _papers.id, _papers.title, _papers.authors, _papers.year, _papers.journal,
+    _papers.volume, _papers.issue, _papers.pages, _papers.url, _papers.abstract,
+    _papers.pdf_path, _papers.pdf_version, _papers.created_at,
+)
+TAG_COLUMNS = (_tags.id, _tags.name, _tags.color, _tags.created_at)
+
+PAPER_FIELDS = tuple(column.key for column in PAPER_COLUMNS)
+TAG_FIELDS = tuple(column.key for column in TAG_COLUMNS)
+
+
+def list_tags(db: Session) -> List[Dict[str, Any]]:
+    """
+    Fetch all tags as plain dicts ready for JSON rendering
+
+    Args:
+        db: Database session
+
+    Returns:
+        List of tag dicts matching schemas.TagOut
+    """
+    rows = db.connection().execute(select(*TAG_COLUMNS)).all()
+    return [dict(zip(TAG_FIELDS, row)) for row in rows]
+
+
+def list_papers(db: Session) -> List[Dict[str, Any]]:
+    """
+    Fetch all papers with their tags as plain dicts ready for JSON rendering
+
+    Tags are loaded with a single join over the association table rather
+    than one lazy load per paper.
+
+    Args:
+        db: Database session
+
+    Returns:
+        List of paper dicts matching schemas.PaperOut
+    """
+    tag_rows = db.connection().execute(
+        select(paper_tags.c.paper_id, *TAG_COLUMNS)
+        .join(Tag.__table__, _tags.id == paper_tags.c.tag_id)
+    ).all()
+    tags_by_paper = defaultdict(list)
+    for paper_id, *tag in tag_rows:
+        tags_by_paper[paper_id].append(dict(zip(TAG_FIELDS, tag)))
+
+    papers = []
+    for row in db.connection().execute(select(*PAPER_COLUMNS)).all():
+        paper = dict(zip(PAPER_FIELDS, row))
+        paper["tags"] = tags_by_paper.get(paper["id"], [])
+        papers.append(paper)
+    return papers
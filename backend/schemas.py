@@ -0,0 +1,108 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Any, Dict, List, Optional, Union
+from datetime import datetime
+
+
+class TagOut(BaseModel):
+    """
+    Tag as returned by the API
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    name: str
+    color: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class PaperOut(BaseModel):
+    """
+    Saved paper as returned by the API
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    title: str
+    authors: Optional[List[str]] = None
+    year: Optional[int] = None
+    journal: Optional[str] = None
+    volume: Optional[str] = None
+    issue: Optional[str] = None
+    pages: Optional[str] = None
+    url: Optional[str] = None
+    abstract: Optional[str] = None
+    pdf_path: Optional[str] = None
+    pdf_version: Optional[str] = None
+    created_at: Optional[datetime] = None
+    tags: List[TagOut] = []
+
+
+class NoteOut(BaseModel):
+    """
+    Note as returned by the API
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    paper_id: str
+    content: Optional[str] = None
+    version: int = 0
+    updated_at: Optional[datetime] = None
+
+
+class NotePatch(BaseModel):
+    """
+    Delta update to a note. `delta` ops are applied to version `base_version`:
+    a positive int retains that many characters, a negative int deletes that
+    many, and a string is inserted. Characters are Unicode code points.
+    """
+    base_version: int
+    delta: List[Union[int, str]]
+
+
+class NoteRevisionOut(BaseModel):
+    """
+    Summary of a saved note revision
+    """
+    version: int
+    created_at: Optional[datetime] = None
+    kind: str  # "snapshot" or "delta"
+
+
+class NoteRevisionContent(BaseModel):
+    """
+    Note content as it was at a given revision
+    """
+    paper_id: str
+    version: int
+    content: str
+
+
+class JobCreate(BaseModel):
+    """
+    Request to submit a background job
+    """
+    type: str
+    params: Dict[str, Any] = {}
+    priority: int = 0  # Higher runs first
+
+
+class JobOut(BaseModel):
+    """
+    Background job as returned by the API
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    type: str
+    status: str  # queued, running, succeeded, failed, cancelled
+    priority: int = 0
+    params: Optional[Dict[str, Any]] = None
+    progress_done: int = 0
+    progress_total: Optional[int] = None
+    message: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -2,26 +2,44 @@
 
 import { useState, useEffect } from "react";
 import { Save, X } from "lucide-react";
+import { NoteConflictError } from "../hooks/useNotes";
 
 interface NoteEditorProps {
     paperId: string;
     initialContent: string;
-    onSave: (content: string) => void;
+    onSave: (content: string) => Promise<unknown>;
     onClose: () => void;
 }
 
 export default function NoteEditor({ paperId, initialContent, onSave, onClose }: NoteEditorProps) {
     const [content, setContent] = useState(initialContent);
     const [hasChanges, setHasChanges] = useState(false);
+    // Latest saved text when our save was rejected because the note changed elsewhere
+    const [conflict, setConflict] = useState<string | null>(null);
 
     useEffect(() => {
         setContent(initialContent);
         setHasChanges(false);
+        setConflict(null);
     }, [paperId, initialContent]);
 
-    const handleSave = () => {
-        onSave(content);
+    const handleSave = async () => {
+        try {
+            await onSave(content);
+            setHasChanges(false);
+            setConflict(null);
+        } catch (error) {
+            if (error instanceof NoteConflictError) {
+                setConflict(error.latest.content || "");
+            }
+        }
+    };
+
+    const handleLoadLatest = () => {
+        if (conflict === null) return;
+        setContent(conflict);
         setHasChanges(false);
+        setConflict(null);
     };
 
     const handleChange = (e: React.ChangeEvent<HTMLTextAreaElement>) => {
@@ -48,6 +66,18 @@ export default function NoteEditor({ paperId, initialContent, onSave, onClose }:
                 </button>
             </div>
 
+            {conflict !== null && (
+                <div className="mb-2 p-2 text-xs text-red-700 bg-red-50 border border-red-200 rounded flex items-center justify-between gap-2">
+                    <span>This note was changed elsewhere. Saving again will replace that version with yours.</span>
+                    <button
+                        onClick={handleLoadLatest}
+                        className="shrink-0 px-2 py-1 rounded bg-white border border-red-200 hover:bg-red-100 transition-colors"
+                    >
+                        Load latest
+                    </button>
+                </div>
+            )}
+
             <textarea
                 value={content}
                 onChange={handleChange}
@@ -23,7 +23,7 @@ interface SavedPapersPanelProps {
     getTagsForPaper: (paper: any) => Tag[];
     getPapersWithTag: (tagId: string) => Promise<string[]>;
     getNote: (paperId: string) => Promise<PaperNote | null>;
-    saveNote: (paperId: string, content: string) => void;
+    saveNote: (paperId: string, content: string) => Promise<PaperNote>;
     hasNote: (paperId: string) => boolean;
     presetColors: string[];
     refreshPapers: () => void;
@@ -295,6 +295,21 @@ export default function SavedPapersPanel({
                                         className="rounded-xl border border-border bg-card p-4 hover:border-primary/30 transition-colors"
                                     >
                                         <div className="flex items-start justify-between gap-4">
+                                            {/* PDF Thumbnail */}
+                                            {paper.pdf_path && (
+                                                <button
+                                                    onClick={() => handleViewPDF(paper.id)}
+                                                    className="shrink-0 rounded-lg overflow-hidden border border-border hover:border-primary/50 transition-colors"
+                                                    title="View PDF"
+                                                >
+                                                    <img
+                                                        src={`/api/pdfs/thumbnail?paper_id=${encodeURIComponent(paper.id)}${paper.pdf_version ? `&v=${paper.pdf_version}` : ""}`}
+                                                        alt="First page preview"
+                                                        loading="lazy"
+                                                        className="w-20 h-auto bg-white"
+                                                    />
+                                                </button>
+                                            )}
                                             <div className="flex-1">
                                                 <h3 className="text-lg font-semibold text-secondary mb-1">
                                                     {paper.title}
@@ -418,9 +433,7 @@ export default function SavedPapersPanel({
                                                     <NoteEditor
                                                         paperId={paper.id}
                                                         initialContent={noteContent}
-                                                        onSave={(content) => {
-                                                            saveNote(paper.id, content);
-                                                        }}
+                                                        onSave={(content) => saveNote(paper.id, content)}
                                                         onClose={() => setOpenedNote(null)}
                                                     />
                                                 )}
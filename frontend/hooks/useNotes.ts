@@ -8,9 +8,50 @@ const API_URL = "";
 export interface PaperNote {
     paper_id: string;
     content: string;
+    version: number;
     updated_at: string;
 }
 
+// Delta ops understood by PATCH /api/notes/{paper_id}:
+// positive number = retain, negative number = delete, string = insert.
+// Lengths count Unicode code points (as Python does), not UTF-16 units,
+// so text is split with Array.from to keep surrogate pairs together.
+type NoteDelta = (number | string)[];
+
+// Describe an edit as a single replaced region between the common prefix and suffix
+const makeDelta = (oldText: string, newText: string): NoteDelta => {
+    const oldChars = Array.from(oldText);
+    const newChars = Array.from(newText);
+    const limit = Math.min(oldChars.length, newChars.length);
+    let prefix = 0;
+    while (prefix < limit && oldChars[prefix] === newChars[prefix]) prefix++;
+    let suffix = 0;
+    while (
+        suffix < limit - prefix &&
+        oldChars[oldChars.length - 1 - suffix] === newChars[newChars.length - 1 - suffix]
+    ) suffix++;
+
+    const deleted = oldChars.length - prefix - suffix;
+    const inserted = newChars.slice(prefix, newChars.length - suffix).join("");
+    const delta: NoteDelta = [];
+    if (prefix) delta.push(prefix);
+    if (deleted) delta.push(-deleted);
+    if (inserted) delta.push(inserted);
+    if (suffix) delta.push(suffix);
+    return delta;
+};
+
+// Thrown when the note changed elsewhere since it was loaded; carries the latest version
+export class NoteConflictError extends Error {
+    latest: PaperNote;
+
+    constructor(latest: PaperNote) {
+        super("This note was changed elsewhere");
+        this.name = "NoteConflictError";
+        this.latest = latest;
+    }
+}
+
 export function useNotes() {
     const [notes, setNotes] = useState<Map<string, PaperNote>>(new Map());
     const [loading, setLoading] = useState(false);
@@ -20,8 +61,9 @@ export function useNotes() {
             const response = await axios.get(`${API_URL}/api/notes/${paperId}`);
             const note = response.data;
 
+            // Cache even empty notes so later saves know which version they edit
+            setNotes((prev) => new Map(prev).set(paperId, note));
             if (note && note.content) {
-                setNotes((prev) => new Map(prev).set(paperId, note));
                 return note;
             }
             return null;
@@ -31,12 +73,41 @@ export function useNotes() {
         }
     };
 
-    const saveNote = async (paperId: string, content: string) => {
+    const saveNote = async (paperId: string, content: string): Promise<PaperNote> => {
         setLoading(true);
         try {
-            const response = await axios.post(`${API_URL}/api/notes/${paperId}`, {
-                content
-            });
+            const previous = notes.get(paperId);
+            let response;
+            try {
+                if (previous) {
+                    try {
+                        // Send only the changed region, checked against the version we last saw
+                        response = await axios.patch(`${API_URL}/api/notes/${paperId}`, {
+                            base_version: previous.version,
+                            delta: makeDelta(previous.content, content),
+                        });
+                    } catch (error) {
+                        // A malformed delta falls back to a full save, still version-checked
+                        if (!axios.isAxiosError(error) || error.response?.status !== 400) {
+                            throw error;
+                        }
+                    }
+                }
+                if (!response) {
+                    response = await axios.post(`${API_URL}/api/notes/${paperId}`, {
+                        content,
+                        base_version: previous?.version,
+                    });
+                }
+            } catch (error) {
+                if (axios.isAxiosError(error) && error.response?.status === 409) {
+                    // Someone else saved first: load their version instead of overwriting it
+                    const latest = (await axios.get(`${API_URL}/api/notes/${paperId}`)).data;
+                    setNotes((prev) => new Map(prev).set(paperId, latest));
+                    throw new NoteConflictError(latest);
+                }
+                throw error;
+            }
 
             const note = response.data;
             setNotes((prev) => new Map(prev).set(paperId, note));
@@ -17,6 +17,7 @@ export interface SavedPaper {
     issue?: string;
     pages?: string;
     pdf_path?: string;  // NEW: path to uploaded PDF
+    pdf_version?: string;  // Content token of the PDF, versions preview image URLs
     created_at?: string;
 }
 